@@ -41,6 +41,8 @@ setup(
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
+            "pytest-xdist>=3.0.0",
+            "pytest-benchmark>=4.0.0",
             "black>=22.0.0",
             "flake8>=4.0.0",
             "mypy>=0.990",
@@ -48,6 +50,8 @@ setup(
         "test": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
+            "pytest-xdist>=3.0.0",
+            "pytest-benchmark>=4.0.0",
             "pytest-cov>=4.0.0",
         ],
     },
@@ -1,4 +1,4 @@
 from .base import LLMProvider
-from .manager import LLMManager
+from .manager import LLMManager, ProviderStatus
 
-__all__ = ["LLMProvider", "LLMManager"]
\ No newline at end of file
+__all__ = ["LLMProvider", "LLMManager", "ProviderStatus"]
\ No newline at end of file
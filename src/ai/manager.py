@@ -1,8 +1,30 @@
 import asyncio
+from dataclasses import dataclass
 from typing import Dict, Any, Optional, List
 from .base import LLMProvider, LLMResponse
 from .providers import OllamaProvider, OpenAIProvider, AnthropicProvider
 
+@dataclass
+class ProviderStatus:
+    """提供商精简状态"""
+    # 手动声明__slots__以兼容Python 3.8（dataclass的slots参数需要3.10+）
+    __slots__ = ("name", "available", "model", "has_api_key")
+    
+    name: str
+    available: bool
+    model: str
+    has_api_key: bool
+    
+    @classmethod
+    def from_dict(cls, name: str, info: Dict[str, Any]) -> "ProviderStatus":
+        """从get_all_status返回的状态字典构建"""
+        return cls(
+            name=name,
+            available=info.get("available", False),
+            model=info.get("model", "未知"),
+            has_api_key=info.get("has_api_key", False)
+        )
+
 class LLMManager:
     """LLM管理器，统一管理多个LLM提供商"""
     
@@ -180,6 +202,10 @@ class LLMManager:
         
         return status
     
+    def get_provider_statuses(self) -> List[ProviderStatus]:
+        """获取所有提供商的精简状态列表"""
+        return [ProviderStatus.from_dict(name, info) for name, info in self.get_all_status().items()]
+    
     def set_default_provider(self, provider_name: str):
         """设置默认提供商"""
         if provider_name in self.providers:
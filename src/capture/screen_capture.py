@@ -1,4 +1,5 @@
 import io
+import os
 import time
 from datetime import datetime
 from pathlib import Path
@@ -79,6 +80,23 @@ class ScreenCapture:
         image.save(str(filepath), format=self.format, **save_kwargs)
         return str(filepath)
     
+    def save_screenshot_fast(self, image: Image.Image, filepath: str) -> str:
+        """快速保存截图（用于临时文件或即将OCR的截图，以文件体积换取编码速度）"""
+        # 格式按扩展名推断，未知扩展名按PNG保存
+        ext = os.path.splitext(filepath)[1].lower()
+        image_format = Image.registered_extensions().get(ext, "PNG")
+        
+        save_kwargs = {}
+        if image_format == "PNG":
+            # 最低压缩级别：文件约大20%，但编码快数倍
+            save_kwargs["compress_level"] = 1
+        
+        # 直接以大缓冲区打开文件描述符，交给PIL写入
+        fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        with os.fdopen(fd, "wb", buffering=1 << 20) as f:
+            image.save(f, format=image_format, **save_kwargs)
+        return filepath
+    
     def image_to_bytes(self, image: Image.Image) -> bytes:
         """将图像转换为字节"""
         img_buffer = io.BytesIO()
@@ -1,5 +1,13 @@
 from .command_parser import CommandParser
-from .action_executor import ActionExecutor
-from .instruction_processor import InstructionProcessor
 
-__all__ = ["CommandParser", "ActionExecutor", "InstructionProcessor"]
\ No newline at end of file
+__all__ = ["CommandParser", "ActionExecutor", "InstructionProcessor"]
+
+def __getattr__(name):
+    """按需导入执行器与指令处理器，只用指令解析时不加载pyautogui和LLM依赖"""
+    if name == "ActionExecutor":
+        from .action_executor import ActionExecutor
+        return ActionExecutor
+    if name == "InstructionProcessor":
+        from .instruction_processor import InstructionProcessor
+        return InstructionProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
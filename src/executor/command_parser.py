@@ -4,6 +4,14 @@ from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass
 from enum import Enum
 
+# 复合指令分隔符（按优先顺序合并为一个模式，一次扫描完成分割）
+_SEPARATORS = [r"[，,]然后", r"[，,]接着", r"[，,]再", r"[，,]and then", r"[，,]then", r"[；;]", r"[，,]"]
+_SPLIT_RE = re.compile("|".join(_SEPARATORS))
+
+_COORD_RE = re.compile(r"\((\d+),\s*(\d+)\)")
+_NUMBER_RE = re.compile(r"(\d+)")
+_QUOTE_RE = re.compile(r'["\']([^"\']*)["\']')
+
 class ActionType(Enum):
     CLICK = "click"
     TYPE = "type"
@@ -97,6 +105,13 @@ class CommandParser:
             "backspace": "BackSpace", "tab": "Tab", "esc": "Escape",
             "return": "Return"
         }
+        
+        # 预编译所有动作模式，保持原有的匹配优先顺序
+        self._compiled_patterns = [
+            (action_type, re.compile(pattern, re.IGNORECASE))
+            for action_type, patterns in self.action_patterns.items()
+            for pattern in patterns
+        ]
     
     def parse_instruction(self, instruction: str) -> List[ParsedAction]:
         """解析用户指令为可执行的动作序列"""
@@ -113,17 +128,15 @@ class CommandParser:
         
         return actions
     
+    def parse_many(self, instructions: List[str]) -> List[List[ParsedAction]]:
+        """批量解析多条指令，返回与输入顺序一致的动作序列列表"""
+        parse = self.parse_instruction
+        return [parse(instruction) for instruction in instructions]
+    
     def _split_compound_instruction(self, instruction: str) -> List[str]:
         """分割复合指令"""
         # 使用常见的分隔符分割指令
-        separators = [r"[，,]然后", r"[，,]接着", r"[，,]再", r"[，,]and then", r"[，,]then", r"[；;]", r"[，,]"]
-        
-        parts = [instruction]
-        for separator in separators:
-            new_parts = []
-            for part in parts:
-                new_parts.extend(re.split(separator, part))
-            parts = new_parts
+        parts = _SPLIT_RE.split(instruction)
         
         return [part.strip() for part in parts if part.strip()]
     
@@ -132,11 +145,10 @@ class CommandParser:
         instruction = instruction.strip()
         
         # 尝试匹配各种动作类型
-        for action_type, patterns in self.action_patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, instruction, re.IGNORECASE)
-                if match:
-                    return self._create_action(action_type, match, instruction)
+        for action_type, pattern in self._compiled_patterns:
+            match = pattern.search(instruction)
+            if match:
+                return self._create_action(action_type, match, instruction)
         
         # 如果没有匹配到明确的动作，尝试推断
         return self._infer_action(instruction)
@@ -151,7 +163,7 @@ class CommandParser:
             parameters = {"target": target.strip()}
             
             # 检查是否有坐标信息
-            coord_match = re.search(r"\((\d+),\s*(\d+)\)", instruction)
+            coord_match = _COORD_RE.search(instruction)
             if coord_match:
                 parameters["x"] = int(coord_match.group(1))
                 parameters["y"] = int(coord_match.group(2))
@@ -169,7 +181,7 @@ class CommandParser:
             parameters = {"direction": direction, "amount": 3}
             
             # 检查滚动距离
-            distance_match = re.search(r"(\d+)", instruction)
+            distance_match = _NUMBER_RE.search(instruction)
             if distance_match:
                 parameters["amount"] = int(distance_match.group(1))
         
@@ -227,7 +239,7 @@ class CommandParser:
             )
         
         # 如果包含引号中的文本，可能是输入操作
-        quote_match = re.search(r'["\']([^"\']*)["\']', instruction)
+        quote_match = _QUOTE_RE.search(instruction)
         if quote_match:
             return ParsedAction(
                 action_type=ActionType.TYPE,
@@ -1,5 +1,13 @@
 from .cli import create_app
-from .interactive import InteractiveUI
-from .status_display import StatusDisplay
 
-__all__ = ["create_app", "InteractiveUI", "StatusDisplay"]
\ No newline at end of file
+__all__ = ["create_app", "InteractiveUI", "StatusDisplay"]
+
+def __getattr__(name):
+    """按需导入交互界面与状态显示，避免CLI启动时加载执行器依赖"""
+    if name == "InteractiveUI":
+        from .interactive import InteractiveUI
+        return InteractiveUI
+    if name == "StatusDisplay":
+        from .status_display import StatusDisplay
+        return StatusDisplay
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,16 +1,17 @@
 import asyncio
+import functools
+import time
 import typer
-from typing import Optional
+from typing import List, Optional, TYPE_CHECKING
 from rich.console import Console
-from rich.panel import Panel
-from rich.text import Text
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from pathlib import Path
 
 from ..config import ConfigManager
-from ..executor import InstructionProcessor
-from .interactive import InteractiveUI
-from .status_display import StatusDisplay
+
+if TYPE_CHECKING:
+    from ..executor import InstructionProcessor
+
+# 重量级模块（执行器、OCR、LLM SDK、rich.progress等）在各命令内部按需导入，
+# 避免 --help 等轻量命令承担完整的导入开销
 
 console = Console()
 app = typer.Typer(help="屏幕AI助手 - 通过AI理解屏幕内容并执行指令")
@@ -30,6 +31,7 @@ def run(
     verbose: bool = typer.Option(False, "--verbose", "-v", help="详细输出"),
 ):
     """运行屏幕AI助手"""
+    from ..executor import InstructionProcessor
     
     try:
         # 加载配置
@@ -45,11 +47,13 @@ def run(
         
         # 检查系统状态
         if verbose:
+            from .status_display import StatusDisplay
             status_display = StatusDisplay(console)
             status_display.show_system_status(processor.get_system_status())
         
         if interactive or not instruction:
             # 启动交互模式
+            from .interactive import InteractiveUI
             ui = InteractiveUI(processor, console)
             asyncio.run(ui.start())
         else:
@@ -67,13 +71,17 @@ def run(
             console.print(traceback.format_exc())
 
 async def _execute_single_instruction(
-    processor: InstructionProcessor,
+    processor: "InstructionProcessor",
     instruction: str,
     use_ai: bool,
     take_screenshot: bool,
     verbose: bool
 ):
     """执行单个指令"""
+    from rich.console import Group
+    from rich.panel import Panel
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.text import Text
     
     with Progress(
         SpinnerColumn(),
@@ -83,7 +91,18 @@ async def _execute_single_instruction(
         
         task = progress.add_task("处理指令中...", total=None)
         
+        # 合并高频进度消息：距上次刷新不足50ms的消息只记录最新一条
+        last_update = 0.0
+        pending_message: Optional[str] = None
+        
         def update_progress(message: str):
+            nonlocal last_update, pending_message
+            now = time.monotonic()
+            if now - last_update < 0.05:
+                pending_message = message
+                return
+            last_update = now
+            pending_message = None
             progress.update(task, description=message)
         
         processor.set_progress_callback(update_progress)
@@ -92,6 +111,8 @@ async def _execute_single_instruction(
             instruction, use_ai, take_screenshot
         )
         
+        if pending_message is not None:
+            progress.update(task, description=pending_message)
         progress.stop()
     
     # 显示结果
@@ -110,10 +131,11 @@ async def _execute_single_instruction(
             ))
         
         if verbose and result.actions_executed:
-            console.print("\n[bold]执行的动作:[/bold]")
+            lines = [Text("\n执行的动作:", style="bold")]
             for i, action_result in enumerate(result.actions_executed, 1):
                 status = "✅" if action_result.success else "❌"
-                console.print(f"{i}. {status} {action_result.message}")
+                lines.append(Text(f"{i}. {status} {action_result.message}"))
+            console.print(Group(*lines))
     else:
         console.print(Panel(
             f"[red]❌ {result.message}[/red]",
@@ -126,6 +148,8 @@ def status(
     config_path: Optional[str] = typer.Option(None, "--config", "-c", help="配置文件路径"),
 ):
     """显示系统状态"""
+    from ..executor import InstructionProcessor
+    from .status_display import StatusDisplay
     
     try:
         config_manager = ConfigManager(config_path)
@@ -158,6 +182,7 @@ def config(
             return
         
         if show:
+            from rich.panel import Panel
             config = config_manager.load_config()
             console.print(Panel(
                 config.model_dump_json(indent=2),
@@ -167,13 +192,20 @@ def config(
             return
         
         if edit:
+            import shutil
             import subprocess
             config_path = config_manager.config_path
             if not config_path.exists():
                 config_manager.load_config()  # 创建默认配置
             
             try:
-                subprocess.run(["open", "-t", str(config_path)])
+                # 编辑器无需等待：open -t 立即返回，编辑器由LaunchServices托管。
+                # 可执行文件为绝对路径且 close_fds=False、不新建会话时，
+                # CPython 在支持的平台上可用 posix_spawn 代替 fork+exec
+                open_path = shutil.which("open")
+                if open_path is None:
+                    raise FileNotFoundError("open")
+                subprocess.Popen([open_path, "-t", str(config_path)], close_fds=False)
                 console.print(f"[green]已在默认编辑器中打开配置文件: {config_path}[/green]")
             except Exception:
                 console.print(f"[yellow]请手动编辑配置文件: {config_path}[/yellow]")
@@ -195,6 +227,7 @@ def screenshot(
     config_path: Optional[str] = typer.Option(None, "--config", "-c", help="配置文件路径"),
 ):
     """截图并可选显示OCR结果"""
+    from ..executor import InstructionProcessor
     
     try:
         config_manager = ConfigManager(config_path)
@@ -206,17 +239,21 @@ def screenshot(
         
         # 保存截图
         if save_path:
-            screenshot.save(save_path)
+            processor.screen_capture.save_screenshot_fast(screenshot, save_path)
             console.print(f"[green]截图已保存到: {save_path}[/green]")
         else:
             import tempfile
             import os
             temp_path = os.path.join(tempfile.gettempdir(), "screen_ai_screenshot.png")
-            screenshot.save(temp_path)
+            processor.screen_capture.save_screenshot_fast(screenshot, temp_path)
             console.print(f"[green]截图已保存到: {temp_path}[/green]")
         
         # OCR识别
         if show_ocr:
+            from rich.panel import Panel
+            from rich.progress import Progress, SpinnerColumn, TextColumn
+            from rich.text import Text
+            
             with Progress(
                 SpinnerColumn(),
                 TextColumn("正在进行OCR识别..."),
@@ -225,9 +262,10 @@ def screenshot(
                 progress.add_task("OCR", total=None)
                 ocr_result = processor.ocr_engine.extract_text_smart(screenshot)
             
-            if ocr_result.text.strip():
+            if not ocr_result.is_empty:
+                # OCR文本按纯文本输出，不做markup解析和高亮
                 console.print(Panel(
-                    ocr_result.text,
+                    Text(ocr_result.text),
                     title=f"OCR识别结果 (置信度: {ocr_result.confidence:.1f}%)",
                     border_style="green"
                 ))
@@ -243,6 +281,9 @@ def test(
     provider: Optional[str] = typer.Option(None, "--provider", "-p", help="测试指定提供商"),
 ):
     """测试系统功能"""
+    from rich.console import Group
+    from rich.text import Text
+    from ..executor import InstructionProcessor
     
     try:
         config_manager = ConfigManager(config_path)
@@ -251,46 +292,71 @@ def test(
         
         console.print("[bold]正在进行系统测试...[/bold]\n")
         
+        # 每个阶段的输出先收集为Text片段，阶段结束时一次性输出
         # 测试屏幕截图
-        console.print("📸 测试屏幕截图...")
+        lines = [Text("📸 测试屏幕截图...")]
+        screenshot = None
         try:
             screenshot = processor.screen_capture.capture_full_screen()
-            console.print(f"[green]✅ 屏幕截图成功 ({screenshot.size[0]}x{screenshot.size[1]})[/green]")
+            lines.append(Text(f"✅ 屏幕截图成功 ({screenshot.size[0]}x{screenshot.size[1]})", style="green"))
         except Exception as e:
-            console.print(f"[red]❌ 屏幕截图失败: {e}[/red]")
+            lines.append(Text(f"❌ 屏幕截图失败: {e}", style="red"))
+        console.print(Group(*lines))
         
         # 测试OCR
-        console.print("🔍 测试OCR识别...")
-        try:
-            ocr_result = processor.ocr_engine.extract_text_fast(screenshot)
-            if ocr_result.text.strip():
-                console.print(f"[green]✅ OCR识别成功 (置信度: {ocr_result.confidence:.1f}%)[/green]")
-            else:
-                console.print("[yellow]⚠️ OCR未识别到文本[/yellow]")
-        except Exception as e:
-            console.print(f"[red]❌ OCR识别失败: {e}[/red]")
+        lines = [Text("🔍 测试OCR识别...")]
+        if screenshot is None:
+            lines.append(Text("⚠️ 无可用截图，跳过OCR测试", style="yellow"))
+        else:
+            try:
+                ocr_result = processor.ocr_engine.extract_text_fast(screenshot)
+                if not ocr_result.is_empty:
+                    lines.append(Text(f"✅ OCR识别成功 (置信度: {ocr_result.confidence:.1f}%)", style="green"))
+                else:
+                    lines.append(Text("⚠️ OCR未识别到文本", style="yellow"))
+            except Exception as e:
+                lines.append(Text(f"❌ OCR识别失败: {e}", style="red"))
+        console.print(Group(*lines))
         
         # 测试LLM
-        console.print("🤖 测试LLM连接...")
+        lines = [Text("🤖 测试LLM连接...")]
         if provider:
             providers_to_test = [provider]
         else:
             providers_to_test = processor.llm_manager.get_available_providers()
         
-        for provider_name in providers_to_test:
+        # 各提供商的连接测试相互独立，并发执行
+        responses = asyncio.run(_test_all_providers(processor, providers_to_test))
+        
+        for provider_name, response in zip(providers_to_test, responses):
             try:
-                response = processor.llm_manager.generate_sync("Hello", provider_name=provider_name)
+                if isinstance(response, Exception):
+                    raise response
                 if response.content and "error" not in response.usage:
-                    console.print(f"[green]✅ {provider_name} 连接成功[/green]")
+                    lines.append(Text(f"✅ {provider_name} 连接成功", style="green"))
                 else:
-                    console.print(f"[red]❌ {provider_name} 连接失败[/red]")
+                    lines.append(Text(f"❌ {provider_name} 连接失败", style="red"))
             except Exception as e:
-                console.print(f"[red]❌ {provider_name} 测试失败: {e}[/red]")
+                lines.append(Text(f"❌ {provider_name} 测试失败: {e}", style="red"))
+        console.print(Group(*lines))
         
         console.print("\n[bold]测试完成![/bold]")
         
     except Exception as e:
         console.print(f"[red]测试过程中发生错误: {e}[/red]")
 
+async def _test_all_providers(processor: "InstructionProcessor", providers: List[str]) -> list:
+    """并发测试多个LLM提供商，结果顺序与providers一致，异常作为结果返回"""
+    # 提供商的可用性检查是同步网络请求，放到线程池中才能真正并发
+    loop = asyncio.get_running_loop()
+    tasks = [
+        loop.run_in_executor(
+            None,
+            functools.partial(processor.llm_manager.generate_sync, "Hello", provider_name=provider_name)
+        )
+        for provider_name in providers
+    ]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -1,5 +1,9 @@
 import asyncio
-from typing import Optional, List
+import itertools
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Optional
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
@@ -10,9 +14,68 @@ from rich.live import Live
 from rich.layout import Layout
 from rich.columns import Columns
 import questionary
+from prompt_toolkit import PromptSession
 from PIL import Image
 
 from ..executor import InstructionProcessor
+from .status_display import StatusDisplay
+
+_WELCOME_TEXT = """
+[bold blue]🤖 屏幕AI助手[/bold blue]
+
+功能特性:
+• 🖼️  智能屏幕截图和分析
+• 👁️  OCR文字识别
+• 🧠 多种LLM支持 (Ollama/OpenAI/Claude)
+• ⚡ 自动化操作执行
+• 💬 自然语言指令处理
+
+输入指令来控制屏幕操作，或输入 'help' 查看帮助。
+输入 'quit' 或 'exit' 退出程序。
+"""
+
+_HELP_TEXT = """
+[bold]基本指令:[/bold]
+• 点击按钮名称               - 点击指定按钮
+• 输入'文本'                - 输入文本
+• 向下滚动                   - 滚动页面
+• 截图                       - 截取屏幕
+• 等待3秒                   - 等待指定时间
+
+[bold]系统命令:[/bold]
+• help                     - 显示此帮助
+• status                   - 显示详细系统状态
+• history                  - 显示命令历史
+• stats                    - 显示会话统计
+• clear                    - 清屏
+• screenshot \\[path]        - 截图并保存
+• config                   - 配置管理
+• quit/exit                - 退出程序
+
+[bold]示例指令:[/bold]
+• 点击登录按钮
+• 输入'用户名'
+• 向下滚动3次
+• 点击坐标(100, 200)
+• 查找'确定'按钮
+"""
+
+# 欢迎与帮助面板内容固定，模块加载时解析一次markup
+_WELCOME_PANEL = Panel(
+    Text.from_markup(_WELCOME_TEXT),
+    border_style="blue",
+    padding=(1, 2)
+)
+
+_HELP_PANEL = Panel(
+    Text.from_markup(_HELP_TEXT),
+    title="帮助信息",
+    border_style="yellow",
+    padding=(1, 2)
+)
+
+_ACTION_OK = Text("✅", style="green")
+_ACTION_FAIL = Text("❌", style="red")
 
 class InteractiveUI:
     """交互式用户界面"""
@@ -20,7 +83,7 @@ class InteractiveUI:
     def __init__(self, processor: InstructionProcessor, console: Console):
         self.processor = processor
         self.console = console
-        self.history: List[str] = []
+        self.history: Deque[str] = deque(maxlen=200)  # 只保留最近200条命令
         self.session_stats = {
             "commands_executed": 0,
             "successful_commands": 0,
@@ -31,9 +94,49 @@ class InteractiveUI:
         self.processor.set_progress_callback(self._progress_callback)
         self.processor.set_screenshot_callback(self._screenshot_callback)
         
+        # 共享的进度显示：实例只创建一次，仅在操作执行期间启动（输入提示时不能有活动的Live显示）
+        self._progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+            transient=True
+        )
         self._current_progress_task = None
         self._progress_console = Console()
-        self._screenshots: List[Image.Image] = []
+        self._screenshot_count: int = 0  # 只计数，不持有截图对象
+        
+        # 状态显示器与系统状态缓存（短时间内重复查看状态时避免重新探测）
+        self._status_display = StatusDisplay(console)
+        self._status_cache: Optional[dict] = None
+        self._status_cache_ts = 0.0
+        self._status_cache_ttl = 2.0  # 秒
+        
+        # 是否有多个可用LLM提供商（首次使用时计算，切换默认提供商时失效）
+        self._multi_provider: Optional[bool] = None
+        
+        # 内置命令分发表
+        self._commands = {
+            'help': self._show_help,
+            'status': self._show_detailed_status,
+            'history': self._show_history,
+            'clear': self._clear_and_welcome,
+            'stats': self._show_session_stats,
+        }
+        # 带参数的前缀命令（按前缀匹配）
+        self._prefix_commands = (
+            ('screenshot', self._handle_screenshot_command),
+            ('config', self._handle_config_command),
+        )
+        
+        # 指令输入会话（questionary基于prompt_toolkit，直接使用其原生异步输入）
+        self._prompt_session = PromptSession()
+        self._qstyle = questionary.Style([
+            ('qmark', 'fg:#FF6B6B bold'),
+            ('question', 'bold'),
+            ('answer', 'fg:#4ECDC4 bold'),
+            ('pointer', 'fg:#FF6B6B bold'),
+            ('highlighted', 'fg:#4ECDC4 bold'),
+        ])
     
     async def start(self):
         """启动交互界面"""
@@ -42,32 +145,22 @@ class InteractiveUI:
     
     def _show_welcome(self):
         """显示欢迎界面"""
-        welcome_text = """
-[bold blue]🤖 屏幕AI助手[/bold blue]
-
-功能特性:
-• 🖼️  智能屏幕截图和分析
-• 👁️  OCR文字识别
-• 🧠 多种LLM支持 (Ollama/OpenAI/Claude)
-• ⚡ 自动化操作执行
-• 💬 自然语言指令处理
-
-输入指令来控制屏幕操作，或输入 'help' 查看帮助。
-输入 'quit' 或 'exit' 退出程序。
-        """
-        
-        self.console.print(Panel(
-            welcome_text,
-            border_style="blue",
-            padding=(1, 2)
-        ))
+        self.console.print(_WELCOME_PANEL)
         
         # 显示系统状态
         self._show_quick_status()
     
+    def _get_system_status(self) -> dict:
+        """获取系统状态，TTL内复用缓存结果"""
+        now = time.monotonic()
+        if self._status_cache is None or now - self._status_cache_ts >= self._status_cache_ttl:
+            self._status_cache = self.processor.get_system_status()
+            self._status_cache_ts = now
+        return self._status_cache
+    
     def _show_quick_status(self):
         """显示快速状态"""
-        status = self.processor.get_system_status()
+        status = self._get_system_status()
         
         # LLM状态
         llm_status = status.get("llm_manager", {})
@@ -102,54 +195,36 @@ class InteractiveUI:
         """主循环"""
         while True:
             try:
-                # 使用questionary获取用户输入
-                user_input = await asyncio.get_event_loop().run_in_executor(
-                    None, 
-                    lambda: questionary.text(
-                        "请输入指令:",
-                        qmark="🎯",
-                        style=questionary.Style([
-                            ('qmark', 'fg:#FF6B6B bold'),
-                            ('question', 'bold'),
-                            ('answer', 'fg:#4ECDC4 bold'),
-                            ('pointer', 'fg:#FF6B6B bold'),
-                            ('highlighted', 'fg:#4ECDC4 bold'),
-                        ])
-                    ).ask()
+                # 在事件循环中直接异步读取用户输入，无需线程池中转
+                user_input = await self._prompt_session.prompt_async(
+                    [('class:qmark', '🎯'), ('class:question', ' 请输入指令: ')],
+                    style=self._qstyle
                 )
                 
                 if not user_input:
                     continue
                 
                 user_input = user_input.strip()
+                command = user_input.lower()
                 
-                if user_input.lower() in ['quit', 'exit', '退出', 'q']:
+                if command in ['quit', 'exit', '退出', 'q']:
                     if Confirm.ask("确定要退出吗?"):
                         break
                     continue
                 
                 # 处理特殊命令
-                if user_input.lower() == 'help':
-                    self._show_help()
-                    continue
-                elif user_input.lower() == 'status':
-                    self._show_detailed_status()
-                    continue
-                elif user_input.lower() == 'history':
-                    self._show_history()
-                    continue
-                elif user_input.lower() == 'clear':
-                    self.console.clear()
-                    self._show_welcome()
-                    continue
-                elif user_input.lower() == 'stats':
-                    self._show_session_stats()
-                    continue
-                elif user_input.lower().startswith('screenshot'):
-                    await self._handle_screenshot_command(user_input)
+                handler = self._commands.get(command)
+                if handler:
+                    handler()
                     continue
-                elif user_input.lower().startswith('config'):
-                    self._handle_config_command(user_input)
+                
+                prefix_handler = next(
+                    (h for prefix, h in self._prefix_commands if command.startswith(prefix)), None
+                )
+                if prefix_handler:
+                    result = prefix_handler(user_input)
+                    if asyncio.iscoroutine(result):
+                        await result
                     continue
                 
                 # 执行用户指令
@@ -158,11 +233,19 @@ class InteractiveUI:
             except KeyboardInterrupt:
                 if Confirm.ask("\n检测到中断，确定要退出吗?"):
                     break
+            except EOFError:
+                # Ctrl-D 直接退出
+                break
             except Exception as e:
                 self.console.print(f"[red]发生错误: {e}[/red]")
         
         self._show_goodbye()
     
+    def _clear_and_welcome(self):
+        """清屏并重新显示欢迎界面"""
+        self.console.clear()
+        self._show_welcome()
+    
     async def _execute_user_instruction(self, instruction: str):
         """执行用户指令"""
         self.history.append(instruction)
@@ -170,11 +253,13 @@ class InteractiveUI:
         
         # 询问是否使用AI分析
         use_ai = True
-        if len(self.processor.llm_manager.get_available_providers()) > 1:
+        if self._multi_provider is None:
+            self._multi_provider = len(self.processor.llm_manager.get_available_providers()) > 1
+        if self._multi_provider:
             use_ai = Confirm.ask("使用AI分析?", default=True)
         
         # 执行指令
-        with self.console.status("[bold green]处理指令中...") as status:
+        with self._progress_task("[bold green]处理指令中..."):
             result = await self.processor.process_instruction(
                 instruction, use_ai_analysis=use_ai
             )
@@ -218,58 +303,23 @@ class InteractiveUI:
         table.add_column("状态", width=8)
         table.add_column("描述")
         
-        for i, action_result in enumerate(actions, 1):
-            status_icon = "✅" if action_result.success else "❌"
-            status_color = "green" if action_result.success else "red"
-            
-            table.add_row(
-                str(i),
-                f"[{status_color}]{status_icon}[/{status_color}]",
-                action_result.message
-            )
+        # 状态单元格复用预先构建的Text，避免每行重新解析markup
+        rows = [
+            (str(i), _ACTION_OK if action_result.success else _ACTION_FAIL, Text(action_result.message))
+            for i, action_result in enumerate(actions, 1)
+        ]
+        for row in rows:
+            table.add_row(*row)
         
         self.console.print(table)
     
     def _show_help(self):
         """显示帮助信息"""
-        help_text = """
-[bold]基本指令:[/bold]
-• 点击按钮名称               - 点击指定按钮
-• 输入'文本'                - 输入文本
-• 向下滚动                   - 滚动页面
-• 截图                       - 截取屏幕
-• 等待3秒                   - 等待指定时间
-
-[bold]系统命令:[/bold]
-• help                     - 显示此帮助
-• status                   - 显示详细系统状态
-• history                  - 显示命令历史
-• stats                    - 显示会话统计
-• clear                    - 清屏
-• screenshot [path]        - 截图并保存
-• config                   - 配置管理
-• quit/exit                - 退出程序
-
-[bold]示例指令:[/bold]
-• 点击登录按钮
-• 输入'用户名'
-• 向下滚动3次
-• 点击坐标(100, 200)
-• 查找'确定'按钮
-        """
-        
-        self.console.print(Panel(
-            help_text,
-            title="帮助信息",
-            border_style="yellow",
-            padding=(1, 2)
-        ))
+        self.console.print(_HELP_PANEL)
     
     def _show_detailed_status(self):
         """显示详细系统状态"""
-        from .status_display import StatusDisplay
-        status_display = StatusDisplay(self.console)
-        status_display.show_system_status(self.processor.get_system_status())
+        self._status_display.show_system_status(self._get_system_status())
     
     def _show_history(self):
         """显示命令历史"""
@@ -281,7 +331,9 @@ class InteractiveUI:
         table.add_column("序号", width=6)
         table.add_column("命令")
         
-        for i, cmd in enumerate(self.history[-10:], 1):  # 只显示最近10条
+        # 只显示最近10条
+        recent = list(itertools.islice(self.history, max(0, len(self.history) - 10), None))
+        for i, cmd in enumerate(recent, 1):
             table.add_row(str(i), cmd)
         
         self.console.print(table)
@@ -315,25 +367,26 @@ class InteractiveUI:
             screenshot = self.processor.screen_capture.capture_full_screen()
             
             if save_path:
-                screenshot.save(save_path)
+                self.processor.screen_capture.save_screenshot_fast(screenshot, save_path)
                 self.console.print(f"[green]截图已保存到: {save_path}[/green]")
             else:
                 import tempfile
                 import os
-                temp_path = os.path.join(tempfile.gettempdir(), f"screenshot_{len(self._screenshots)}.png")
-                screenshot.save(temp_path)
+                temp_path = os.path.join(tempfile.gettempdir(), f"screenshot_{self._screenshot_count}.png")
+                self.processor.screen_capture.save_screenshot_fast(screenshot, temp_path)
                 self.console.print(f"[green]截图已保存到: {temp_path}[/green]")
             
-            self._screenshots.append(screenshot)
+            self._screenshot_count += 1
             
             # 询问是否进行OCR
             if Confirm.ask("进行OCR文字识别?"):
-                with self.console.status("正在进行OCR识别..."):
+                with self._progress_task("正在进行OCR识别..."):
                     ocr_result = self.processor.ocr_engine.extract_text_smart(screenshot)
                 
-                if ocr_result.text.strip():
+                if not ocr_result.is_empty:
+                    # OCR文本按纯文本输出，不做markup解析和高亮
                     self.console.print(Panel(
-                        ocr_result.text,
+                        Text(ocr_result.text),
                         title=f"OCR识别结果 (置信度: {ocr_result.confidence:.1f}%)",
                         border_style="green"
                     ))
@@ -346,7 +399,7 @@ class InteractiveUI:
     def _handle_config_command(self, command: str):
         """处理配置命令"""
         # 显示当前LLM配置
-        llm_status = self.processor.llm_manager.get_all_status()
+        llm_statuses = self.processor.llm_manager.get_provider_statuses()
         
         table = Table(title="LLM配置", show_header=True, header_style="bold green")
         table.add_column("提供商", width=12)
@@ -354,19 +407,16 @@ class InteractiveUI:
         table.add_column("模型")
         table.add_column("详情")
         
-        for name, info in llm_status.items():
-            if isinstance(info, dict):
-                status = "✅ 可用" if info.get("available", False) else "❌ 不可用"
-                model = info.get("model", "未知")
-                details = f"API密钥: {'✅' if info.get('has_api_key', False) else '❌'}"
-                
-                table.add_row(name, status, model, details)
+        for provider_status in llm_statuses:
+            status = "✅ 可用" if provider_status.available else "❌ 不可用"
+            details = f"API密钥: {'✅' if provider_status.has_api_key else '❌'}"
+            
+            table.add_row(provider_status.name, status, provider_status.model, details)
         
         self.console.print(table)
         
         # 提供切换选项
-        available_providers = [name for name, info in llm_status.items() 
-                             if isinstance(info, dict) and info.get("available", False)]
+        available_providers = [s.name for s in llm_statuses if s.available]
         
         if len(available_providers) > 1:
             choice = questionary.select(
@@ -377,26 +427,41 @@ class InteractiveUI:
             
             if choice and choice != self.processor.llm_manager.default_provider:
                 self.processor.llm_manager.set_default_provider(choice)
+                self._multi_provider = None
                 self.console.print(f"[green]默认LLM提供商已切换为: {choice}[/green]")
     
+    @contextmanager
+    def _progress_task(self, description: str):
+        """在共享进度显示中运行一个任务"""
+        task_id = self._progress.add_task(description, total=None)
+        self._current_progress_task = task_id
+        self._progress.start()
+        try:
+            yield task_id
+        finally:
+            self._progress.stop()
+            self._progress.remove_task(task_id)
+            self._current_progress_task = None
+    
     def _progress_callback(self, message: str):
         """进度回调"""
-        # 由于rich的限制，这里暂时不实现实时进度更新
-        pass
+        if self._current_progress_task is not None:
+            self._progress.update(self._current_progress_task, description=message)
     
     def _screenshot_callback(self, screenshot: Image.Image):
         """截图回调"""
-        self._screenshots.append(screenshot)
+        self._screenshot_count += 1
     
     def _show_goodbye(self):
         """显示退出信息"""
+        self._progress.stop()
         self.console.print(Panel(
             "[bold blue]感谢使用屏幕AI助手![/bold blue]\n\n"
             f"本次会话统计:\n"
             f"• 执行命令: {self.session_stats['commands_executed']}\n"
             f"• 成功: {self.session_stats['successful_commands']}\n"
             f"• 失败: {self.session_stats['failed_commands']}\n"
-            f"• 截图: {len(self._screenshots)}",
+            f"• 截图: {self._screenshot_count}",
             title="再见",
             border_style="blue",
             padding=(1, 2)
@@ -1,18 +1,68 @@
-from typing import Dict, Any
+import functools
+import json
+from typing import Dict, Any, Tuple
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.columns import Columns
 from rich.text import Text
 
+# 预构建的状态单元格，避免每次渲染重复解析markup
+_OK = Text("✅ 可用", style="green")
+_FAIL = Text("❌ 不可用", style="red")
+_NO_CONFIG = Text("❌ 无配置", style="red")
+
+# 性能统计示例数据（静态，模块级冻结）
+_PERF_COMPONENTS: Tuple[Tuple[str, str, str, str], ...] = (
+    ("屏幕截图", "0.15s", "42", "100%"),
+    ("OCR识别", "1.2s", "38", "95%"),
+    ("LLM分析", "3.8s", "25", "92%"),
+    ("动作执行", "0.8s", "156", "88%"),
+)
+
+@functools.lru_cache(maxsize=8)
+def _build_performance_table(components: Tuple[Tuple[str, str, str, str], ...]) -> Table:
+    """按组件数据构建性能统计表格（结果缓存）"""
+    table = Table(title="性能统计", show_header=True, header_style="bold yellow")
+    table.add_column("组件", width=15)
+    table.add_column("平均用时", width=12)
+    table.add_column("调用次数", width=10)
+    table.add_column("成功率", width=10)
+    
+    for component, avg_time, count, success_rate in components:
+        table.add_row(component, avg_time, count, success_rate)
+    
+    return table
+
 class StatusDisplay:
     """状态显示器"""
     
     def __init__(self, console: Console):
         self.console = console
+        # 上次渲染的状态哈希与面板，状态未变化时直接复用
+        self._last_status_hash = None
+        self._last_panels = None
+        # 数值单元格缓存: (样式, 数值) -> Text
+        self._cell_cache: Dict[Tuple[str, Any], Text] = {}
+    
+    def _styled_cell(self, value: Any, style: str) -> Text:
+        """获取带样式的数值单元格（按值缓存）"""
+        key = (style, value)
+        cell = self._cell_cache.get(key)
+        if cell is None:
+            if len(self._cell_cache) >= 256:
+                self._cell_cache.clear()
+            cell = Text(str(value), style=style)
+            self._cell_cache[key] = cell
+        return cell
     
     def show_system_status(self, status: Dict[str, Any]):
         """显示完整系统状态"""
+        status_hash = hash(json.dumps(status, sort_keys=True, default=str))
+        if status_hash == self._last_status_hash and self._last_panels is not None:
+            for panel in self._last_panels:
+                self.console.print(panel)
+            return
         
         # 屏幕截图状态
         screen_panel = self._create_screen_status_panel(status.get("screen_capture", {}))
@@ -27,23 +77,29 @@ class StatusDisplay:
         executor_panel = self._create_executor_status_panel(status.get("action_executor", {}))
         
         # 组合显示
-        self.console.print(Panel(
-            Columns([screen_panel, ocr_panel], equal=True, expand=True),
-            title="📸 截图 & 🔍 OCR 状态",
-            border_style="blue"
-        ))
-        
-        self.console.print(Panel(
-            llm_panel,
-            title="🤖 LLM 状态",
-            border_style="green"
-        ))
-        
-        self.console.print(Panel(
-            executor_panel,
-            title="⚡ 执行器状态",
-            border_style="yellow"
-        ))
+        panels = (
+            Panel(
+                Columns([screen_panel, ocr_panel], equal=True, expand=True),
+                title="📸 截图 & 🔍 OCR 状态",
+                border_style="blue"
+            ),
+            Panel(
+                llm_panel,
+                title="🤖 LLM 状态",
+                border_style="green"
+            ),
+            Panel(
+                executor_panel,
+                title="⚡ 执行器状态",
+                border_style="yellow"
+            ),
+        )
+        
+        self._last_status_hash = status_hash
+        self._last_panels = panels
+        
+        for panel in panels:
+            self.console.print(panel)
     
     def _create_screen_status_panel(self, screen_status: Dict[str, Any]) -> Panel:
         """创建屏幕状态面板"""
@@ -82,10 +138,7 @@ class StatusDisplay:
         for provider_name, info in llm_status.items():
             if isinstance(info, dict):
                 # 状态
-                if info.get("available", False):
-                    status = "[green]✅ 可用[/green]"
-                else:
-                    status = "[red]❌ 不可用[/red]"
+                status = _OK if info.get("available", False) else _FAIL
                 
                 # 模型
                 model = info.get("model", "未知")
@@ -108,7 +161,7 @@ class StatusDisplay:
                 table.add_row(provider_name.title(), status, model, details_text)
         
         if not llm_status:
-            table.add_row("-", "[red]❌ 无配置[/red]", "-", "-")
+            table.add_row("-", _NO_CONFIG, "-", "-")
         
         return table
     
@@ -126,8 +179,8 @@ class StatusDisplay:
         success_rate = executor_status.get("success_rate", 0)
         
         table.add_row("总动作数", str(total_actions), "-")
-        table.add_row("成功动作", f"[green]{successful_actions}[/green]", "-")
-        table.add_row("失败动作", f"[red]{failed_actions}[/red]", "-")
+        table.add_row("成功动作", self._styled_cell(successful_actions, "green"), "-")
+        table.add_row("失败动作", self._styled_cell(failed_actions, "red"), "-")
         table.add_row("成功率", f"{success_rate:.1%}", "-")
         table.add_row("平均用时", f"{avg_time:.2f}s", "-")
         
@@ -188,22 +241,5 @@ class StatusDisplay:
     
     def show_performance_stats(self, stats: Dict[str, Any]):
         """显示性能统计"""
-        table = Table(title="性能统计", show_header=True, header_style="bold yellow")
-        table.add_column("组件", width=15)
-        table.add_column("平均用时", width=12)
-        table.add_column("调用次数", width=10)
-        table.add_column("成功率", width=10)
-        
-        # 这里可以添加各组件的性能数据
-        # 示例数据
-        components = [
-            ("屏幕截图", "0.15s", "42", "100%"),
-            ("OCR识别", "1.2s", "38", "95%"),
-            ("LLM分析", "3.8s", "25", "92%"),
-            ("动作执行", "0.8s", "156", "88%"),
-        ]
-        
-        for component, avg_time, count, success_rate in components:
-            table.add_row(component, avg_time, count, success_rate)
-        
-        self.console.print(table)
\ No newline at end of file
+        # 这里可以添加各组件的性能数据，目前使用示例数据
+        self.console.print(_build_performance_table(_PERF_COMPONENTS))
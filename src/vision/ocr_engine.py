@@ -1,27 +1,153 @@
 import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Dict, Optional, Tuple
 import pytesseract
 from PIL import Image
 import cv2
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from .image_processor import ImageProcessor
 
+try:
+    from numba import njit
+except ImportError:  # 可选依赖，缺失时使用纯Python实现
+    njit = None
+
+try:
+    import tesserocr
+except ImportError:  # 可选依赖，缺失时通过pytesseract调用tesseract命令行
+    tesserocr = None
+
+# 快速模式允许识别的字符
+_FAST_WHITELIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+# 多页批量识别时tesseract在每页文本末尾输出的分页符
+_PAGE_SEPARATOR = '\x0c'
+
+# 裁剪区域数超过该值时合并为一次多页TIFF识别
+_BATCH_CROP_THRESHOLD = 3
+
+# 置信度估算使用的常见单词
+_COMMON_WORDS = ('the', 'and', 'or', 'is', 'to', 'of', 'in', 'a', 'an')
+_COMMON_RE = re.compile(r'\b(?:%s)\b' % '|'.join(_COMMON_WORDS), re.IGNORECASE)
+
+if njit is not None:
+    @njit(cache=True)
+    def _scan_ascii(buf):
+        """单次遍历ASCII字节，返回(是否含数字, 是否含字母, 特殊字符数)，分类规则与str方法一致"""
+        has_digit = False
+        has_alpha = False
+        special = 0
+        for b in buf:
+            if 48 <= b <= 57:
+                has_digit = True
+            elif 65 <= b <= 90 or 97 <= b <= 122:
+                has_alpha = True
+            elif not (b == 32 or 9 <= b <= 13 or 28 <= b <= 31):
+                special += 1
+        return has_digit, has_alpha, special
+else:
+    _scan_ascii = None
+
+# 并行OCR使用的进程池（首次使用时创建，所有OCREngine共享）
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+# 子进程内的图像处理器，由进程池初始化函数创建
+_worker_image_processor: Optional[ImageProcessor] = None
+
+def _init_ocr_worker(tesseract_cmd: str):
+    """进程池初始化：设置tesseract路径并创建本进程的图像处理器"""
+    global _worker_image_processor
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    _worker_image_processor = ImageProcessor()
+
+def _ocr_worker(image: Image.Image, languages: str, config: str) -> str:
+    """在子进程中预处理图像并直接调用tesseract，返回识别文本"""
+    processed_image = _worker_image_processor.preprocess_for_ocr(image, fast_mode=True)
+    
+    # BMP无压缩，编码远快于pytesseract默认使用的PNG
+    with tempfile.NamedTemporaryFile(suffix='.bmp', delete=False) as f:
+        processed_image.save(f, format='BMP')
+        image_path = f.name
+    
+    try:
+        completed = subprocess.run(
+            [pytesseract.pytesseract.tesseract_cmd, image_path, 'stdout', '-l', languages,
+             *shlex.split(config)],
+            capture_output=True,
+            check=True
+        )
+        return completed.stdout.decode('utf-8', errors='ignore').strip()
+    finally:
+        os.remove(image_path)
+
+def _get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """获取共享进程池：按 min(max_workers, CPU核心数) 创建，请求更多进程时重建"""
+    global _process_pool, _process_pool_workers
+    max_workers = min(max_workers, os.cpu_count() or 1)
+    with _process_pool_lock:
+        if _process_pool is not None and _process_pool_workers < max_workers:
+            # 已提交的任务仍会在旧进程池中执行完毕
+            _process_pool.shutdown(wait=False)
+            _process_pool = None
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_ocr_worker,
+                initargs=(pytesseract.pytesseract.tesseract_cmd,)
+            )
+            _process_pool_workers = max_workers
+        return _process_pool
+
+def _discard_process_pool(pool: ProcessPoolExecutor):
+    """丢弃已损坏的进程池（仍是共享池时），下次使用时重新创建"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+def _shutdown_process_pool():
+    """关闭共享进程池"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+            _process_pool = None
+
+def _prefer_bmp(image: Image.Image) -> Image.Image:
+    """让pytesseract以BMP格式写临时文件（未指定格式时默认PNG，压缩后又被立即解码）"""
+    if not image.format:
+        image.format = 'BMP'
+    return image
+
 @dataclass
 class OCRResult:
     text: str
     confidence: float
     bbox: Optional[Tuple[int, int, int, int]] = None
     language: Optional[str] = None
+    is_empty: bool = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        # 构造时计算一次；isspace在遇到第一个非空白字符时即返回，无需扫描全文
+        self.is_empty = not self.text or self.text.isspace()
 
 class OCREngine:
     """高性能OCR引擎"""
     
     def __init__(self, languages: str = "eng+chi_sim", tesseract_path: Optional[str] = None):
-        self.languages = languages
+        self.languages = sys.intern(languages)
         self.image_processor = ImageProcessor()
         self._thread_local = threading.local()
         
@@ -34,17 +160,29 @@ class OCREngine:
             pytesseract.pytesseract.tesseract_cmd = '/usr/local/bin/tesseract'
         
         # 性能优化配置
-        self.fast_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz \t\n'
+        self.fast_config = rf'--oem 3 --psm 6 -c tessedit_char_whitelist={_FAST_WHITELIST} \t\n'
         self.detailed_config = r'--oem 3 --psm 3'
         
+        # 各模式配置在初始化时解析一次
+        self._configs = {
+            "fast": sys.intern(self.fast_config),
+            "detailed": sys.intern(self.detailed_config),
+            "default": sys.intern(r'--oem 3 --psm 6'),
+        }
+    
+    def _get_tesserocr_api(self):
+        """获取当前线程的tesserocr实例（语言模型每个线程只加载一次）"""
+        api = getattr(self._thread_local, 'api', None)
+        if api is None:
+            # 与fast_config保持一致：--psm 6 + 字符白名单
+            api = tesserocr.PyTessBaseAPI(lang=self.languages, psm=tesserocr.PSM.SINGLE_BLOCK)
+            api.SetVariable('tessedit_char_whitelist', _FAST_WHITELIST)
+            self._thread_local.api = api
+        return api
+    
     def _get_tesseract_config(self, mode: str = "fast") -> str:
         """获取tesseract配置"""
-        if mode == "fast":
-            return self.fast_config
-        elif mode == "detailed":
-            return self.detailed_config
-        else:
-            return r'--oem 3 --psm 6'
+        return self._configs.get(mode, self._configs["default"])
     
     def extract_text_fast(self, image: Image.Image, preprocess: bool = True) -> OCRResult:
         """快速文本提取（优化速度）"""
@@ -57,15 +195,22 @@ class OCREngine:
             processed_image = image
         
         try:
-            # 使用快速配置
-            text = pytesseract.image_to_string(
-                processed_image, 
-                lang=self.languages,
-                config=self._get_tesseract_config("fast")
-            ).strip()
-            
-            # 快速置信度估算
-            confidence = self._estimate_confidence_fast(text)
+            if tesserocr is not None:
+                # 进程内调用tesseract API，避免每次启动子进程和写临时文件
+                api = self._get_tesserocr_api()
+                api.SetImage(processed_image)
+                text = api.GetUTF8Text().strip()
+                confidence = float(api.MeanTextConf()) if text else 0.0
+            else:
+                # 使用快速配置
+                text = pytesseract.image_to_string(
+                    _prefer_bmp(processed_image), 
+                    lang=self.languages,
+                    config=self._get_tesseract_config("fast")
+                ).strip()
+                
+                # 快速置信度估算
+                confidence = self._estimate_confidence_fast(text)
             
             processing_time = time.time() - start_time
             
@@ -92,37 +237,29 @@ class OCREngine:
         try:
             # 获取详细信息
             data = pytesseract.image_to_data(
-                processed_image,
+                _prefer_bmp(processed_image),
                 lang=self.languages,
                 config=self._get_tesseract_config("detailed"),
                 output_type=pytesseract.Output.DICT
             )
             
-            # 过滤高置信度文本
-            words = []
-            confidences = []
-            bboxes = []
+            # 过滤高置信度文本：按列转为数组后一次性掩码筛选
+            confs = np.asarray(data['conf'], dtype=np.float64).astype(np.int32)
+            words = np.char.strip(np.asarray(data['text'], dtype=str))
+            mask = (confs > 30) & (np.char.str_len(words) > 0)  # 置信度阈值且非空
             
-            for i, conf in enumerate(data['conf']):
-                if int(conf) > 30:  # 置信度阈值
-                    word = data['text'][i].strip()
-                    if word:
-                        words.append(word)
-                        confidences.append(int(conf))
-                        bboxes.append((
-                            data['left'][i],
-                            data['top'][i],
-                            data['left'][i] + data['width'][i],
-                            data['top'][i] + data['height'][i]
-                        ))
+            bboxes = np.stack(
+                [data['left'], data['top'], data['width'], data['height']], axis=1
+            ).astype(np.int32).reshape(-1, 4)[mask]
+            bboxes[:, 2:] += bboxes[:, :2]  # (x, y, w, h) -> (x1, y1, x2, y2)
             
-            text = ' '.join(words)
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+            text = ' '.join(words[mask].tolist())
+            avg_confidence = float(confs[mask].mean()) if mask.any() else 0.0
             
             return OCRResult(
                 text=text,
                 confidence=avg_confidence,
-                bbox=bboxes[0] if bboxes else None,
+                bbox=tuple(bboxes[0].tolist()) if len(bboxes) else None,
                 language=self.languages
             )
             
@@ -133,35 +270,95 @@ class OCREngine:
                 language=self.languages
             )
     
+    def _submit_parallel(self, images: List[Image.Image], max_workers: int) -> Dict:
+        """向共享进程池提交OCR任务，返回 future -> 图像索引
+        
+        进程池大小与本次图像数量无关；单次调用的实际并行度不超过图像数量。
+        """
+        config = self._get_tesseract_config("fast")
+        
+        executor = _get_process_pool(max_workers)
+        try:
+            return {
+                executor.submit(_ocr_worker, img, self.languages, config): i 
+                for i, img in enumerate(images)
+            }
+        except BrokenProcessPool:
+            # 有工作进程异常退出后该进程池不再接受任务，换用新进程池重试一次
+            _discard_process_pool(executor)
+            executor = _get_process_pool(max_workers)
+            return {
+                executor.submit(_ocr_worker, img, self.languages, config): i 
+                for i, img in enumerate(images)
+            }
+    
+    def _result_from_future(self, future) -> OCRResult:
+        """将子进程返回的文本转换为OCR结果"""
+        try:
+            text = future.result()
+            return OCRResult(
+                text=text,
+                confidence=self._estimate_confidence_fast(text),
+                language=self.languages
+            )
+        except Exception:
+            return OCRResult("", 0.0, language=self.languages)
+    
     def extract_text_parallel(self, images: List[Image.Image], max_workers: int = 4) -> List[OCRResult]:
-        """并行处理多张图像"""
+        """并行处理多张图像
+        
+        使用进程池：预处理和图像编码在各子进程中执行，不受GIL限制。
+        进程池在各次调用间复用，max_workers超过现有进程数时重建。
+        """
         if not images:
             return []
         
-        # 根据CPU核心数调整工作线程数
-        max_workers = min(max_workers, len(images), os.cpu_count() or 1)
+        future_to_image = self._submit_parallel(images, max_workers)
+        
+        # 按原始顺序直接写入对应位置
+        results: List[Optional[OCRResult]] = [None] * len(images)
+        for future in as_completed(future_to_image):
+            results[future_to_image[future]] = self._result_from_future(future)
+        
+        return results
+    
+    def _ocr_crops_batched(self, crops: List[Image.Image]) -> List[OCRResult]:
+        """将多个裁剪区域写入一个多页TIFF，只启动一次tesseract完成识别
+        
+        tesseract逐页输出文本并以分页符结尾，按分页符切分即可得到各区域的结果。
+        """
+        pages = [self.image_processor.preprocess_for_ocr(crop, fast_mode=True) for crop in crops]
+        
+        with tempfile.NamedTemporaryFile(suffix='.tif', delete=False) as f:
+            pages[0].save(f, format='TIFF', save_all=True, append_images=pages[1:])
+            image_path = f.name
+        
+        try:
+            completed = subprocess.run(
+                [pytesseract.pytesseract.tesseract_cmd, image_path, 'stdout', '-l', self.languages,
+                 *shlex.split(self._get_tesseract_config("fast"))],
+                capture_output=True,
+                check=True
+            )
+            texts = completed.stdout.decode('utf-8', errors='ignore').split(_PAGE_SEPARATOR)
+        except Exception:
+            texts = []
+        finally:
+            os.remove(image_path)
+        
+        # 分页数不足时（识别失败等）剩余区域返回空结果
+        texts += [''] * (len(crops) - len(texts))
         
         results = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交任务
-            future_to_image = {
-                executor.submit(self.extract_text_fast, img): i 
-                for i, img in enumerate(images)
-            }
-            
-            # 收集结果
-            for future in as_completed(future_to_image):
-                try:
-                    result = future.result()
-                    image_index = future_to_image[future]
-                    results.append((image_index, result))
-                except Exception as e:
-                    image_index = future_to_image[future]
-                    results.append((image_index, OCRResult("", 0.0, language=self.languages)))
-        
-        # 按原始顺序排序
-        results.sort(key=lambda x: x[0])
-        return [result for _, result in results]
+        for text in texts[:len(crops)]:
+            text = text.strip()
+            results.append(OCRResult(
+                text=text,
+                confidence=self._estimate_confidence_fast(text),
+                language=self.languages
+            ))
+        
+        return results
     
     def extract_text_smart(self, image: Image.Image, strategy: str = "auto") -> OCRResult:
         """智能文本提取：根据图像特征选择最佳策略"""
@@ -184,20 +381,28 @@ class OCREngine:
             return self.extract_text_detailed(image)
         
         elif strategy == "crop_parallel":
+            # 边缘稀疏的图像裁剪收益很小，直接单次快速识别
+            if not self.image_processor.should_crop(image):
+                return self.extract_text_fast(image)
+            
             # 裁剪并并行处理
             crops = self.image_processor.smart_crop(image)
             if len(crops) == 1:
                 return self.extract_text_fast(crops[0])
             
-            results = self.extract_text_parallel(crops)
+            # 区域较多时合并为一次tesseract调用，否则并行识别
+            if len(crops) > _BATCH_CROP_THRESHOLD:
+                results = self._ocr_crops_batched(crops)
+            else:
+                results = self.extract_text_parallel(crops)
             
-            # 合并结果
+            # 按裁剪区域顺序合并结果，同一截图每次得到相同的文本顺序
             combined_text = []
             total_confidence = 0.0
             valid_results = 0
             
             for result in results:
-                if result.text.strip():
+                if not result.is_empty:
                     combined_text.append(result.text.strip())
                     total_confidence += result.confidence
                     valid_results += 1
@@ -221,14 +426,22 @@ class OCREngine:
         # 基于文本特征的简单置信度估算
         confidence = 50.0  # 基础置信度
         
-        # 包含常见单词加分
-        common_words = ['the', 'and', 'or', 'is', 'to', 'of', 'in', 'a', 'an']
-        for word in common_words:
-            if word in text.lower():
-                confidence += 5.0
+        # 包含常见单词加分（单次正则扫描，命中次数上限与单词表长度一致）
+        hits = len(_COMMON_RE.findall(text))
+        confidence += 5.0 * min(hits, len(_COMMON_WORDS))
+        
+        # 字符分类：纯ASCII文本用JIT编译的单次扫描，否则逐字符判断
+        if _scan_ascii is not None and text.isascii():
+            has_digit, has_alpha, special_chars = _scan_ascii(
+                np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+            )
+        else:
+            has_digit = any(c.isdigit() for c in text)
+            has_alpha = any(c.isalpha() for c in text)
+            special_chars = sum(1 for c in text if not c.isalnum() and not c.isspace())
         
         # 包含数字和字母组合加分
-        if any(c.isdigit() for c in text) and any(c.isalpha() for c in text):
+        if has_digit and has_alpha:
             confidence += 10.0
         
         # 文本长度合理性
@@ -236,7 +449,6 @@ class OCREngine:
             confidence += 10.0
         
         # 特殊字符过多减分
-        special_chars = sum(1 for c in text if not c.isalnum() and not c.isspace())
         if special_chars > len(text) * 0.3:
             confidence -= 20.0
         
@@ -294,4 +506,9 @@ class OCREngine:
     
     def cleanup(self):
         """清理资源"""
-        self.image_processor.clear_cache()
\ No newline at end of file
+        self.image_processor.clear_cache()
+        api = getattr(self._thread_local, 'api', None)
+        if api is not None:
+            api.End()
+            self._thread_local.api = None
+        _shutdown_process_pool()
\ No newline at end of file
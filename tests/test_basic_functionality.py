@@ -1,34 +1,111 @@
 import unittest
 import asyncio
-from unittest.mock import Mock, patch, MagicMock
-from PIL import Image
+from unittest.mock import Mock, MagicMock
 import tempfile
 import os
+import sys
+import time
+import dataclasses
+import functools
+import importlib.util
+import pytest
 
+# 模块级只导入轻量依赖，PIL、OCR、LLM等重量级模块在用到的测试内按需导入
 from src.config import ConfigManager
-from src.capture import ScreenCapture
-from src.vision import OCREngine, ImageProcessor
-from src.ai import LLMManager
-from src.executor import CommandParser, ActionExecutor, InstructionProcessor
-from src.executor.command_parser import ActionType
+from src.executor.command_parser import CommandParser, ActionType, ParsedAction
+
+@functools.lru_cache(maxsize=None)
+def _canvas(width, height, color="white"):
+    """纯色测试画布：同尺寸同颜色只分配一次，由NumPy整块填充后包装为PIL图像
+    
+    返回的图像在测试间共享，使用方不得原地修改。
+    """
+    import numpy as np
+    from PIL import Image, ImageColor
+    buf = np.full((height, width, 3), ImageColor.getrgb(color), dtype=np.uint8)
+    return Image.fromarray(buf)
+
+# 点击动作模板，各测试用dataclasses.replace派生具体动作
+_CLICK_TEMPLATE = ParsedAction(
+    action_type=ActionType.CLICK,
+    parameters={},
+    confidence=0.9,
+    original_text="",
+    description=""
+)
+
+# 模拟的健康检查响应（只读，各测试共用）
+_OK_RESPONSE = Mock(status_code=200)
+
+def _large_image():
+    """性能测试共用的1920x1080白色画布（预处理不会修改输入图像）"""
+    return _canvas(1920, 1080)
+
+@functools.lru_cache(maxsize=None)
+def _ocr_engine():
+    """测试共用的OCR引擎（各测试在调用时替换模块级依赖，引擎本身无需重建）"""
+    from src.vision import OCREngine
+    return OCREngine()
+
+# Linux下没有X11/Wayland显示时无法获取真实屏幕信息
+_HEADLESS = (sys.platform.startswith("linux")
+             and not os.environ.get("DISPLAY")
+             and not os.environ.get("WAYLAND_DISPLAY"))
+
+_shared_processor = None
+
+def _get_shared_processor(config_dict):
+    """获取模块内共享的指令处理器（截图、OCR、LLM、执行器只初始化一次）"""
+    global _shared_processor
+    if _shared_processor is None:
+        from src.executor import InstructionProcessor
+        _shared_processor = InstructionProcessor(config_dict)
+    return _shared_processor
+
+def _bench(fn, repeat=5):
+    """先预热一次，再返回repeat次运行中的最短耗时（秒）"""
+    fn()  # 预热：触发惰性初始化，计时只反映稳定状态
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        elapsed = time.perf_counter_ns() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / 1e9
+
+def _on_class_loop(coro_fn):
+    """在测试类共享的事件循环上运行异步测试方法"""
+    @functools.wraps(coro_fn)
+    def wrapper(self, *args, **kwargs):
+        return self.loop.run_until_complete(coro_fn(self, *args, **kwargs))
+    return wrapper
+
+# pytest-benchmark为可选插件，未安装时跳过基准测试
+_HAS_BENCHMARK = importlib.util.find_spec("pytest_benchmark") is not None
 
 class TestBasicFunctionality(unittest.TestCase):
     """基础功能测试"""
     
-    def setUp(self):
-        """测试准备"""
-        self.config_manager = ConfigManager()
-        self.config = self.config_manager.load_config()
+    @classmethod
+    def setUpClass(cls):
+        """测试准备：整个测试类只加载一次配置（各测试只读使用）"""
+        cls.config_manager = ConfigManager()
+        cls.config = cls.config_manager.load_config()
+        cls.config_dict = cls.config.model_dump()
     
     def test_config_loading(self):
         """测试配置加载"""
         self.assertIsNotNone(self.config)
-        self.assertIn("llm", self.config.model_dump())
-        self.assertIn("capture", self.config.model_dump())
-        self.assertIn("ocr", self.config.model_dump())
+        self.assertIn("llm", self.config_dict)
+        self.assertIn("capture", self.config_dict)
+        self.assertIn("ocr", self.config_dict)
     
+    @unittest.skipIf(_HEADLESS, "headless CI has no display")
     def test_screen_capture_basic(self):
         """测试基础屏幕截图功能"""
+        from src.capture import ScreenCapture
+        
         capture = ScreenCapture()
         
         # 测试获取屏幕尺寸
@@ -38,64 +115,35 @@ class TestBasicFunctionality(unittest.TestCase):
         self.assertGreater(size[0], 0)
         self.assertGreater(size[1], 0)
     
-    @patch('src.capture.screen_capture.ImageGrab.grab')
-    def test_screen_capture_mock(self, mock_grab):
+    def test_screen_capture_mock(self):
         """测试屏幕截图（模拟）"""
-        # 创建模拟图像
-        mock_image = Image.new('RGB', (100, 100), color='red')
-        mock_grab.return_value = mock_image
+        from src.capture import ScreenCapture
         
-        capture = ScreenCapture()
-        screenshot = capture.capture_full_screen()
+        # 模拟图像
+        mock_image = _canvas(100, 100, 'red')
+        calls = []
         
-        self.assertEqual(screenshot.size, (100, 100))
-        mock_grab.assert_called_once()
-    
-    def test_command_parser_basic(self):
-        """测试基础指令解析"""
-        parser = CommandParser()
+        def fake_grab(*args, **kwargs):
+            calls.append(args)
+            return mock_image
         
-        # 测试点击指令
-        actions = parser.parse_instruction("点击登录按钮")
-        self.assertGreater(len(actions), 0)
-        self.assertEqual(actions[0].action_type, ActionType.CLICK)
-        self.assertIn("target", actions[0].parameters)
-        
-        # 测试输入指令
-        actions = parser.parse_instruction("输入'hello world'")
-        self.assertGreater(len(actions), 0)
-        self.assertEqual(actions[0].action_type, ActionType.TYPE)
-        self.assertEqual(actions[0].parameters["text"], "hello world")
-        
-        # 测试滚动指令
-        actions = parser.parse_instruction("向下滚动")
-        self.assertGreater(len(actions), 0)
-        self.assertEqual(actions[0].action_type, ActionType.SCROLL)
-        self.assertEqual(actions[0].parameters["direction"], "down")
-    
-    def test_command_parser_complex(self):
-        """测试复杂指令解析"""
-        parser = CommandParser()
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr('src.capture.screen_capture.ImageGrab.grab', fake_grab)
+            capture = ScreenCapture()
+            screenshot = capture.capture_full_screen()
         
-        # 测试复合指令
-        actions = parser.parse_instruction("点击登录按钮，然后输入'用户名'")
-        self.assertGreaterEqual(len(actions), 2)
-        
-        # 测试坐标指令
-        actions = parser.parse_instruction("点击坐标(100, 200)")
-        self.assertGreater(len(actions), 0)
-        action = actions[0]
-        self.assertEqual(action.action_type, ActionType.CLICK)
-        self.assertTrue(action.parameters["use_coordinates"])
-        self.assertEqual(action.parameters["x"], 100)
-        self.assertEqual(action.parameters["y"], 200)
+        self.assertEqual(screenshot.size, (100, 100))
+        self.assertEqual(len(calls), 1)
     
     def test_image_processor_basic(self):
         """测试图像处理器基础功能"""
+        from PIL import Image
+        from src.vision import ImageProcessor
+        
         processor = ImageProcessor()
         
-        # 创建测试图像
-        test_image = Image.new('RGB', (200, 100), color='white')
+        # 测试图像
+        test_image = _canvas(200, 100)
         
         # 测试快速预处理
         processed = processor.preprocess_for_ocr(test_image, fast_mode=True)
@@ -110,24 +158,58 @@ class TestBasicFunctionality(unittest.TestCase):
         self.assertIn("cache_size", cache_stats)
         self.assertIn("max_cache_size", cache_stats)
     
-    @patch('src.vision.ocr_engine.pytesseract.image_to_string')
-    def test_ocr_engine_mock(self, mock_ocr):
+    def test_ocr_engine_mock(self):
         """测试OCR引擎（模拟）"""
-        mock_ocr.return_value = "Test text content"
+        calls = []
+        
+        def fake_image_to_string(*args, **kwargs):
+            calls.append(args)
+            return "Test text content"
+        
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr('src.vision.ocr_engine.tesserocr', None)
+            mp.setattr('src.vision.ocr_engine.pytesseract.image_to_string', fake_image_to_string)
+            
+            ocr = _ocr_engine()
+            test_image = _canvas(200, 100)
+            
+            # 测试快速文本提取
+            result = ocr.extract_text_fast(test_image)
         
-        ocr = OCREngine()
-        test_image = Image.new('RGB', (200, 100), color='white')
-        
-        # 测试快速文本提取
-        result = ocr.extract_text_fast(test_image)
         self.assertEqual(result.text, "Test text content")
         self.assertGreater(result.confidence, 0)
-        
-        mock_ocr.assert_called()
+        self.assertTrue(calls)
+    
+    def test_ocr_crops_batched_mock(self):
+        """测试多页批量OCR：按分页符切分，页数不足补空，识别失败时全部为空"""
+        import subprocess
+        from src.vision.ocr_engine import _BATCH_CROP_THRESHOLD
+        
+        def fake_run(args, **kwargs):
+            return subprocess.CompletedProcess(args, 0, stdout=b"foo\x0cbar\x0c")
+        
+        def failing_run(args, **kwargs):
+            raise subprocess.CalledProcessError(1, args)
+        
+        ocr = _ocr_engine()
+        crops = [_canvas(40, 20)] * 4
+        self.assertGreater(len(crops), _BATCH_CROP_THRESHOLD)
+        
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr('src.vision.ocr_engine.subprocess.run', fake_run)
+            results = ocr._ocr_crops_batched(crops)
+        self.assertEqual([r.text for r in results], ['foo', 'bar', '', ''])
+        
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr('src.vision.ocr_engine.subprocess.run', failing_run)
+            results = ocr._ocr_crops_batched(crops)
+        self.assertEqual([r.text for r in results], [''] * len(crops))
     
     def test_llm_manager_initialization(self):
         """测试LLM管理器初始化"""
-        llm_config = self.config.llm.model_dump()
+        from src.ai import LLMManager
+        
+        llm_config = self.config_dict["llm"]
         manager = LLMManager(llm_config)
         
         self.assertIsNotNone(manager.providers)
@@ -136,38 +218,44 @@ class TestBasicFunctionality(unittest.TestCase):
         # 测试状态获取
         status = manager.get_all_status()
         self.assertIsInstance(status, dict)
+        
+        # 测试精简状态列表
+        statuses = manager.get_provider_statuses()
+        self.assertEqual([s.name for s in statuses], list(status.keys()))
     
-    @patch('src.executor.action_executor.pyautogui.click')
-    def test_action_executor_mock(self, mock_click):
+    def test_action_executor_mock(self):
         """测试动作执行器（模拟）"""
-        executor = ActionExecutor(safety_mode=True)
+        from src.executor import ActionExecutor
         
-        from src.executor.command_parser import ParsedAction
+        clicks = []
+        executor = ActionExecutor(safety_mode=True)
         
         # 创建点击动作
-        action = ParsedAction(
-            action_type=ActionType.CLICK,
+        action = dataclasses.replace(
+            _CLICK_TEMPLATE,
             parameters={"x": 100, "y": 100, "use_coordinates": True},
-            confidence=0.9,
             original_text="点击(100, 100)",
             description="点击坐标"
         )
         
-        result = executor.execute_action(action)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr('src.executor.action_executor.pyautogui.click',
+                       lambda *args, **kwargs: clicks.append(args))
+            result = executor.execute_action(action)
+        
         self.assertTrue(result.success)
-        mock_click.assert_called_with(100, 100)
+        self.assertEqual(clicks[-1], (100, 100))
     
     def test_action_executor_safety(self):
         """测试动作执行器安全检查"""
-        executor = ActionExecutor(safety_mode=True)
+        from src.executor import ActionExecutor
         
-        from src.executor.command_parser import ParsedAction
+        executor = ActionExecutor(safety_mode=True)
         
         # 测试超出屏幕范围的点击
-        action = ParsedAction(
-            action_type=ActionType.CLICK,
+        action = dataclasses.replace(
+            _CLICK_TEMPLATE,
             parameters={"x": 99999, "y": 99999, "use_coordinates": True},
-            confidence=0.9,
             original_text="点击(99999, 99999)",
             description="超范围点击"
         )
@@ -178,8 +266,7 @@ class TestBasicFunctionality(unittest.TestCase):
     
     def test_instruction_processor_integration(self):
         """测试指令处理器集成"""
-        config_dict = self.config.model_dump()
-        processor = InstructionProcessor(config_dict)
+        processor = _get_shared_processor(self.config_dict)
         
         # 测试系统状态
         status = processor.get_system_status()
@@ -192,37 +279,90 @@ class TestBasicFunctionality(unittest.TestCase):
         analysis = processor.get_screen_analysis()
         self.assertIsInstance(analysis, dict)
 
-class TestAsyncFunctionality(unittest.IsolatedAsyncioTestCase):
-    """异步功能测试"""
+@pytest.fixture(scope="session")
+def parser():
+    """整个测试会话共用一个指令解析器"""
+    return CommandParser()
+
+@pytest.mark.parametrize("text, action_type, check", [
+    ("点击登录按钮", ActionType.CLICK, lambda a: "target" in a.parameters),
+    ("输入'hello world'", ActionType.TYPE, lambda a: a.parameters["text"] == "hello world"),
+    ("向下滚动", ActionType.SCROLL, lambda a: a.parameters["direction"] == "down"),
+    ("点击坐标(100, 200)", ActionType.CLICK,
+     lambda a: a.parameters["use_coordinates"] and (a.parameters["x"], a.parameters["y"]) == (100, 200)),
+], ids=["click", "type", "scroll", "click_coordinates"])
+def test_command_parser_single(parser, text, action_type, check):
+    """测试单条指令解析"""
+    actions = parser.parse_instruction(text)
+    assert len(actions) > 0
+    assert actions[0].action_type == action_type
+    assert check(actions[0])
+
+def test_command_parser_compound(parser):
+    """测试复合指令解析"""
+    actions = parser.parse_instruction("点击登录按钮，然后输入'用户名'")
+    assert len(actions) >= 2
+
+class TestAsyncFunctionality(unittest.TestCase):
+    """异步功能测试（整个测试类共用一个事件循环，不再每个测试创建和销毁）"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """加载一次配置供所有异步测试复用"""
+        cls.loop = asyncio.new_event_loop()
+        cls.config_manager = ConfigManager()
+        cls.config = cls.config_manager.load_config()
+        cls.config_dict = cls.config.model_dump()
+        # _ai_analyze_and_plan 在类上替换，共享实例同样生效
+        cls.processor = _get_shared_processor(cls.config_dict)
     
-    async def asyncSetUp(self):
-        """异步测试准备"""
-        self.config_manager = ConfigManager()
-        self.config = self.config_manager.load_config()
-        self.processor = InstructionProcessor(self.config.model_dump())
+    @classmethod
+    def tearDownClass(cls):
+        """关闭共享的事件循环"""
+        cls.loop.run_until_complete(cls.loop.shutdown_asyncgens())
+        cls.loop.close()
     
-    @patch('src.ai.providers.ollama_provider.requests.get')
-    async def test_llm_provider_mock(self, mock_get):
-        """测试LLM提供商（模拟）"""
+    @_on_class_loop
+    async def test_all_providers_available(self):
+        """测试所有LLM提供商可用性检查（模拟，并发执行）"""
         # 模拟Ollama健康检查
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        health_checks = []
         
-        from src.ai.providers.ollama_provider import OllamaProvider
+        def fake_get(url, *args, **kwargs):
+            health_checks.append(url)
+            return _OK_RESPONSE
         
-        provider = OllamaProvider({
-            "base_url": "http://localhost:11434",
-            "model": "test-model"
-        })
+        from src.ai.providers.ollama_provider import OllamaProvider
+        from src.ai.providers.openai_provider import OpenAIProvider
+        from src.ai.providers.anthropic_provider import AnthropicProvider
         
-        self.assertTrue(provider.is_available())
+        providers = [
+            OllamaProvider({"base_url": "http://localhost:11434", "model": "test-model"}),
+            OpenAIProvider({"api_key": "test-key", "model": "gpt-4o"}),
+            AnthropicProvider({"api_key": "test-key", "model": "claude-3-5-haiku-20241022"}),
+        ]
+        # 云端提供商的可用性检查会发起API请求，替换为模拟客户端
+        for provider in providers[1:]:
+            provider.client = Mock()
+        
+        # is_available是同步方法，放到线程池中并发执行
+        loop = asyncio.get_running_loop()
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr('src.ai.providers.ollama_provider.requests.get', fake_get)
+            results = await asyncio.gather(
+                *(loop.run_in_executor(None, provider.is_available) for provider in providers)
+            )
+        
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(len(health_checks), 1)
     
-    @patch.object(InstructionProcessor, '_ai_analyze_and_plan')
-    async def test_instruction_processing_mock(self, mock_ai_analyze):
+    @_on_class_loop
+    async def test_instruction_processing_mock(self):
         """测试指令处理（模拟）"""
+        from src.executor import InstructionProcessor
+        
         # 模拟AI分析结果
-        mock_ai_analyze.return_value = {
+        ai_result = {
             "analysis": "测试分析",
             "intent": "测试意图",
             "actions": [{
@@ -234,11 +374,16 @@ class TestAsyncFunctionality(unittest.IsolatedAsyncioTestCase):
             "explanation": "测试解释"
         }
         
-        result = await self.processor.process_instruction(
-            "截图", 
-            use_ai_analysis=True, 
-            take_screenshot=False
-        )
+        async def fake_ai_analyze(self, *args, **kwargs):
+            return ai_result
+        
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(InstructionProcessor, '_ai_analyze_and_plan', fake_ai_analyze)
+            result = await self.processor.process_instruction(
+                "截图", 
+                use_ai_analysis=True, 
+                take_screenshot=False
+            )
         
         self.assertTrue(result.success)
         self.assertIsNotNone(result.ai_analysis)
@@ -270,46 +415,46 @@ class TestErrorHandling(unittest.TestCase):
     
     def test_ocr_error_handling(self):
         """测试OCR错误处理"""
-        ocr = OCREngine()
+        ocr = _ocr_engine()
         
         # 测试空图像
         try:
-            empty_image = Image.new('RGB', (1, 1), color='white')
+            empty_image = _canvas(1, 1)
             result = ocr.extract_text_fast(empty_image)
             self.assertIsInstance(result.text, str)
             self.assertGreaterEqual(result.confidence, 0)
         except Exception as e:
             self.fail(f"OCR should handle empty images gracefully: {e}")
 
+@pytest.mark.xdist_group("perf")
 class TestPerformance(unittest.TestCase):
     """性能测试"""
     
     def test_image_processing_performance(self):
         """测试图像处理性能"""
+        from PIL import Image
+        from src.vision import ImageProcessor
+        
         processor = ImageProcessor()
         
-        # 创建大图像
-        large_image = Image.new('RGB', (1920, 1080), color='white')
+        # 使用共享的大图像
+        large_image = _large_image()
         
-        import time
-        start_time = time.time()
+        def preprocess():
+            processor.clear_cache()  # 每次都执行完整预处理，不命中缓存
+            return processor.preprocess_for_ocr(large_image, fast_mode=True)
         
         # 测试快速预处理
-        processed = processor.preprocess_for_ocr(large_image, fast_mode=True)
-        
-        processing_time = time.time() - start_time
+        processing_time = _bench(preprocess)
         
         # 快速模式应该在合理时间内完成
-        self.assertLess(processing_time, 2.0)  # 2秒内
-        self.assertIsInstance(processed, Image.Image)
+        self.assertLess(processing_time, 0.5)  # 500ms内
+        self.assertIsInstance(preprocess(), Image.Image)
     
     def test_command_parsing_performance(self):
         """测试指令解析性能"""
         parser = CommandParser()
         
-        import time
-        start_time = time.time()
-        
         # 解析多个指令
         test_instructions = [
             "点击登录按钮",
@@ -319,34 +464,50 @@ class TestPerformance(unittest.TestCase):
             "截图"
         ]
         
-        for instruction in test_instructions:
-            actions = parser.parse_instruction(instruction)
+        # 批量解析结果与逐条解析一致
+        results = parser.parse_many(test_instructions)
+        self.assertEqual(results, [parser.parse_instruction(i) for i in test_instructions])
+        for actions in results:
             self.assertIsInstance(actions, list)
         
-        parsing_time = time.time() - start_time
+        parsing_time = _bench(lambda: parser.parse_many(test_instructions))
         
         # 解析应该很快
-        self.assertLess(parsing_time, 0.1)  # 100ms内
+        self.assertLess(parsing_time, 0.02)  # 20ms内
 
-if __name__ == '__main__':
-    # 创建测试套件
-    loader = unittest.TestLoader()
-    suite = unittest.TestSuite()
+@pytest.mark.skipif(not _HAS_BENCHMARK, reason="pytest-benchmark not installed")
+def test_image_preprocess_benchmark(benchmark):
+    """基准测试：大图快速预处理（每轮清空缓存，测量完整预处理）"""
+    from PIL import Image
+    from src.vision import ImageProcessor
     
-    # 添加测试类
-    suite.addTests(loader.loadTestsFromTestCase(TestBasicFunctionality))
-    suite.addTests(loader.loadTestsFromTestCase(TestAsyncFunctionality))
-    suite.addTests(loader.loadTestsFromTestCase(TestErrorHandling))
-    suite.addTests(loader.loadTestsFromTestCase(TestPerformance))
+    processor = ImageProcessor()
+    large_image = _large_image()
     
-    # 运行测试
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
+    def preprocess():
+        processor.clear_cache()
+        return processor.preprocess_for_ocr(large_image, fast_mode=True)
+    
+    result = benchmark(preprocess)
+    assert isinstance(result, Image.Image)
+
+@pytest.mark.skipif(not _HAS_BENCHMARK, reason="pytest-benchmark not installed")
+def test_command_parsing_benchmark(benchmark, parser):
+    """基准测试：批量指令解析"""
+    instructions = ["点击登录按钮", "输入'用户名'", "向下滚动", "等待3秒", "截图"]
+    
+    results = benchmark(parser.parse_many, instructions)
+    assert len(results) == len(instructions)
+
+# 本地开发默认遇到第一个失败即停止；CI中设置FAILFAST=0运行全部测试
+_FAILFAST = os.environ.get("FAILFAST", "1") != "0"
+
+if __name__ == '__main__':
+    args = ["-q", __file__]
+    if _FAILFAST:
+        args.insert(0, "-x")
+    # 安装了pytest-xdist时按CPU核数分发到多个进程，性能测试集中在同一进程
+    if importlib.util.find_spec("xdist") is not None:
+        args[:0] = ["-n", "auto", "--dist", "loadgroup"]
     
-    # 输出结果
-    if result.wasSuccessful():
-        print("\n✅ 所有测试通过!")
-    else:
-        print(f"\n❌ {len(result.failures)} 个测试失败, {len(result.errors)} 个错误")
-        for test, traceback in result.failures + result.errors:
-            print(f"  - {test}: {traceback}")
\ No newline at end of file
+    sys.exit(pytest.main(args))